@@ -15,11 +15,12 @@ Example:
     >>> writer.write_file(conversation, "output.llmc")
 """
 
-from .parser import LLMCParser
-from .writer import LLMCWriter
+from typing import TYPE_CHECKING, Any
+
 from .types import (
     LLMCConversation,
     LLMCMessage,
+    LLMCMessageColumns,
     LLMCMetadata,
     LLMCAttachment,
     LLMCError,
@@ -30,6 +31,10 @@ from .types import (
     AttachmentType,
 )
 
+if TYPE_CHECKING:
+    from .parser import LLMCParser
+    from .writer import LLMCWriter
+
 __version__ = "0.1.0"
 __author__ = "LLMC Format Team"
 __email__ = "team@llmc-format.org"
@@ -42,6 +47,7 @@ __all__ = [
     # Type definitions
     "LLMCConversation",
     "LLMCMessage",
+    "LLMCMessageColumns",
     "LLMCMetadata",
     "LLMCAttachment",
     "MessageRole",
@@ -60,6 +66,23 @@ __all__ = [
 ]
 
 
+def __getattr__(name: str) -> Any:
+    """Import the parser and writer on first use (PEP 562).
+
+    Keeps ``import llmc_python`` cheap for tools that only need one side,
+    since the parser pulls in PyYAML and SQLite handling.
+    """
+    if name == "LLMCParser":
+        from .parser import LLMCParser
+
+        return LLMCParser
+    if name == "LLMCWriter":
+        from .writer import LLMCWriter
+
+        return LLMCWriter
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def parse_file(file_path: str) -> LLMCConversation:
     """Convenience function to parse an LLMC file.
 
@@ -69,6 +92,8 @@ def parse_file(file_path: str) -> LLMCConversation:
     Returns:
         Parsed conversation data
     """
+    from .parser import LLMCParser
+
     parser = LLMCParser()
     return parser.parse_file(file_path)
 
@@ -80,6 +105,8 @@ def write_file(conversation: LLMCConversation, file_path: str) -> None:
         conversation: Conversation data to write
         file_path: Output file path
     """
+    from .writer import LLMCWriter
+
     writer = LLMCWriter()
     writer.write_file(conversation, file_path)
 
@@ -1,33 +1,238 @@
 """LLMC file parser implementation."""
 
+import json
+import mmap
+import os
+import re
 import sqlite3
-import struct
+import tempfile
+import threading
+import weakref
+from collections.abc import MutableMapping
+from contextlib import contextmanager
+from itertools import groupby
+from operator import itemgetter
 from pathlib import Path
-from typing import BinaryIO, Union
+from typing import Any, BinaryIO, Iterator, Optional, Union
 
 import yaml
 
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None  # type: ignore[assignment]
+
+try:
+    from yaml import CSafeLoader as _SafeLoader
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeLoader as _SafeLoader  # type: ignore[assignment]
+
 from .types import (
+    LLMC_FORMAT_VERSION,
+    LLMC_HEADER_STRUCT,
     LLMC_MAGIC,
+    LLMC_REQUIRED_METADATA_FIELDS,
     LLMC_VERSION,
     SQLITE_APPLICATION_ID,
+    TMPFS_DIR,
     LLMCAttachment,
     LLMCConversation,
     LLMCFormatError,
     LLMCMessage,
+    LLMCMessageColumns,
     LLMCMetadata,
     LLMCParseError,
 )
 
 __all__ = ["LLMCParser"]
 
+# bytes, or a memoryview over a memory-mapped file
+_ReadableBuffer = Union[bytes, memoryview]
+
+_HAS_DESERIALIZE = hasattr(sqlite3.Connection, "deserialize")
+_HAS_BLOBOPEN = hasattr(sqlite3.Connection, "blobopen")
+
+# Database schemas: "js" is written by the JavaScript SDK, "py" by this SDK
+_SCHEMA_JS = "js"
+_SCHEMA_PY = "py"
+
+_MESSAGES_SQL_JS = """
+    SELECT id, role, content, timestamp, parent_id, metadata
+    FROM messages
+    ORDER BY sequence, timestamp
+"""
+_MESSAGES_SQL_PY = """
+    SELECT id, role, content, timestamp, parent_id, attachments, metadata
+    FROM messages
+    ORDER BY timestamp
+"""
+_ATTACHMENT_IDS_SQL_JS = """
+    SELECT message_id, id
+    FROM attachments
+    ORDER BY message_id, id
+"""
+_ATTACHMENTS_SQL_JS = """
+    SELECT id, filename, content_type, size, data, metadata
+    FROM attachments
+"""
+_ATTACHMENTS_SQL_PY = """
+    SELECT id, filename, content_type, size, data, created_at, metadata
+    FROM attachments
+"""
+# Lazy variants select the rowid in place of a BLOB, and any other data (NULL
+# or TEXT) as is; both share one column layout
+_LAZY_ATTACHMENTS_SQL_JS = """
+    SELECT id, filename, content_type, size,
+           CASE WHEN typeof(data) = 'blob' THEN rowid END,
+           CASE WHEN typeof(data) = 'blob' THEN NULL ELSE data END,
+           NULL, metadata
+    FROM attachments
+"""
+_LAZY_ATTACHMENTS_SQL_PY = """
+    SELECT id, filename, content_type, size,
+           CASE WHEN typeof(data) = 'blob' THEN rowid END,
+           CASE WHEN typeof(data) = 'blob' THEN NULL ELSE data END,
+           created_at, metadata
+    FROM attachments
+"""
+
+
+# orjson reads integers outside the 64-bit range as floats; a run of 19
+# digits marks a value that may hold one (or just a long digit string, which
+# is harmless)
+_LONG_DIGITS = re.compile(r"\d{19}")
+
+
+def _json_loads(value: Union[str, bytes]) -> Any:
+    """Decode a JSON column, with orjson when it reads the value as json would.
+
+    Values orjson rejects (``NaN`` and ``Infinity``, which ``json.dumps``
+    writes) or would read differently (integers outside the 64-bit range)
+    are decoded by ``json.loads``, so the result does not depend on orjson
+    being installed. So are columns stored as BLOBs.
+    """
+    if orjson is None or not isinstance(value, str) or _LONG_DIGITS.search(value):
+        return json.loads(value)
+    try:
+        return orjson.loads(value)
+    except orjson.JSONDecodeError:
+        return json.loads(value)
+
+
+def _write_temp_file(data: _ReadableBuffer, directory: Optional[str]) -> str:
+    """Write data to a new temporary file and return its path."""
+    with tempfile.NamedTemporaryFile(dir=directory, delete=False) as tmp_file:
+        try:
+            tmp_file.write(data)
+        except BaseException:
+            tmp_file.close()
+            os.unlink(tmp_file.name)
+            raise
+    return tmp_file.name
+
+
+def _loads_lenient(value: Optional[Union[str, bytes]]) -> Any:
+    """Decode a JSON column, treating empty or malformed values as missing."""
+    if not value:
+        return None
+    try:
+        return _json_loads(value)
+    except json.JSONDecodeError:
+        return None
+
+
+class _BlobReader:
+    """Reads attachment BLOBs from the connection a lazy parse left open.
+
+    The connection is shared by all of a file's lazy attachments and closed
+    once the last of them is garbage collected. It is opened without the
+    same-thread check, so reads are serialized with a lock instead.
+    """
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self._conn = conn
+        self._lock = threading.Lock()
+        self._finalizer = weakref.finalize(self, conn.close)
+
+    def read(self, rowid: int) -> bytes:
+        try:
+            with self._lock, self._conn.blobopen(  # type: ignore[attr-defined, unused-ignore]
+                "attachments", "data", rowid, readonly=True
+            ) as blob:
+                data: bytes = blob.read()
+                return data
+        except sqlite3.Error as e:
+            raise LLMCFormatError(f"Failed to read attachment data: {e}") from e
+
+    def close(self) -> None:
+        self._finalizer()
+
+
+class _NotLoaded:
+    """Placeholder for attachment data that has not been read yet."""
+
+    def __repr__(self) -> str:
+        return "<not loaded>"
+
+
+_NOT_LOADED = _NotLoaded()
+
+
+class _LazyAttachment(MutableMapping):
+    """Attachment mapping whose ``data`` BLOB is read on first access.
+
+    Behaves like the attachment dict an eager parse returns: ``data`` is
+    one of its keys throughout, and is read whenever a value is needed
+    (``a["data"]``, ``items()``, ``dict(a)``, ``==``). Pickling and copying
+    produce that plain dict.
+    """
+
+    __slots__ = ("_fields", "_reader", "_rowid")
+
+    def __init__(self, fields: dict, reader: _BlobReader, rowid: int) -> None:
+        self._fields = fields
+        self._reader = reader
+        self._rowid = rowid
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._fields[key]
+        if value is _NOT_LOADED:
+            value = self._fields[key] = self._reader.read(self._rowid)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._fields[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self._fields[key]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._fields)
+
+    def __len__(self) -> int:
+        return len(self._fields)
+
+    def __repr__(self) -> str:
+        return repr(self._fields)
+
+    def __reduce__(self) -> tuple:
+        return dict, (dict(self),)
+
 
 class LLMCParser:
     """Parser for LLMC files."""
 
-    def __init__(self) -> None:
-        """Initialize the parser."""
-        pass
+    def __init__(self, columnar_messages: bool = False, lazy_attachments: bool = False) -> None:
+        """Initialize the parser.
+
+        Args:
+            columnar_messages: Return ``conversation["messages"]`` as an
+                ``LLMCMessageColumns`` instead of a list of dicts
+            lazy_attachments: Defer reading each attachment's ``data`` until
+                it is accessed (Python 3.11+; loaded eagerly otherwise)
+        """
+        self.columnar_messages = columnar_messages
+        self.lazy_attachments = lazy_attachments
 
     def parse_file(self, file_path: Union[str, Path]) -> LLMCConversation:
         """Parse an LLMC file from disk.
@@ -44,7 +249,14 @@ class LLMCParser:
         """
         try:
             with open(file_path, "rb") as f:
-                return self.parse_stream(f)
+                try:
+                    mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+                except (OSError, ValueError):
+                    # Empty files and non-regular files cannot be mapped
+                    return self.parse_stream(f)
+
+                with mapped:
+                    return self._parse_mapped(mapped)
         except (OSError, IOError) as e:
             raise LLMCParseError(f"Failed to read file {file_path}: {e}") from e
 
@@ -67,63 +279,83 @@ class LLMCParser:
             
             # Read YAML metadata
             yaml_data = self._read_yaml_section(stream, header["yaml_length"])
-            metadata = self._parse_metadata(yaml_data)
             
             # Read SQLite data
             stream.seek(header["sqlite_offset"])
             sqlite_data = stream.read()
             
-            # Parse SQLite database
-            messages, attachments = self._parse_sqlite_data(sqlite_data)
-            
-            # Construct conversation
-            conversation: LLMCConversation = {
-                "metadata": metadata,
-                "messages": messages,
-            }
-            
-            if attachments:
-                conversation["attachments"] = attachments
-                
-            return conversation
+            return self._parse_sections(yaml_data, sqlite_data)
             
         except Exception as e:
             if isinstance(e, (LLMCParseError, LLMCFormatError)):
                 raise
             raise LLMCParseError(f"Unexpected error during parsing: {e}") from e
 
+    def _parse_mapped(self, mapped: mmap.mmap) -> LLMCConversation:
+        """Parse a memory-mapped LLMC file.
+
+        The header and YAML sections are read through the mmap's file API;
+        the SQLite section is handed on as a memoryview so it is not copied
+        into an intermediate bytes object.
+        """
+        try:
+            header = self._read_header(mapped)  # type: ignore[arg-type]
+            yaml_data = self._read_yaml_section(mapped, header["yaml_length"])  # type: ignore[arg-type]
+
+            # Views must be released before the mmap can be closed
+            with memoryview(mapped) as view, view[header["sqlite_offset"]:] as sqlite_data:
+                return self._parse_sections(yaml_data, sqlite_data)
+
+        except Exception as e:
+            if isinstance(e, (LLMCParseError, LLMCFormatError)):
+                raise
+            raise LLMCParseError(f"Unexpected error during parsing: {e}") from e
+
+    def _parse_sections(self, yaml_data: bytes, sqlite_data: _ReadableBuffer) -> LLMCConversation:
+        """Parse the YAML and SQLite sections into a conversation."""
+        metadata = self._parse_metadata(yaml_data)
+
+        # Parse SQLite database
+        messages, attachments = self._parse_sqlite_data(sqlite_data)
+
+        # Construct conversation
+        conversation: LLMCConversation
+        if attachments:
+            conversation = {
+                "metadata": metadata,
+                "messages": messages,
+                "attachments": attachments,
+            }
+        else:
+            conversation = {"metadata": metadata, "messages": messages}
+
+        return conversation
+
     def _read_header(self, stream: BinaryIO) -> dict:
         """Read and validate LLMC file header (32 bytes)."""
-        # Read magic header (8 bytes): "LLMC\x01\x00\x00\x00"
-        magic = stream.read(4)
+        buf = stream.read(LLMC_HEADER_STRUCT.size)
+        if len(buf) != LLMC_HEADER_STRUCT.size:
+            raise LLMCFormatError("Incomplete file header")
+
+        # Encryption flags are not used in v0.1
+        (
+            magic,
+            version,
+            format_version,
+            yaml_length,
+            sqlite_offset,
+            _encryption_flags,
+        ) = LLMC_HEADER_STRUCT.unpack(buf)
+
         if magic != LLMC_MAGIC:
             raise LLMCFormatError(f"Invalid magic bytes: {magic!r}")
 
-        # Read version
-        version = struct.unpack("<B", stream.read(1))[0]
         if version != LLMC_VERSION:
             raise LLMCFormatError(f"Unsupported version: {version}")
 
-        # Skip reserved bytes (3 bytes)
-        stream.read(3)
-
-        # Read format version (4 bytes)
-        format_version = struct.unpack("<I", stream.read(4))[0]
-        if format_version != 1:
+        if format_version != LLMC_FORMAT_VERSION:
             raise LLMCFormatError(f"Unsupported format version: {format_version}")
 
-        # Read YAML length (4 bytes)
-        yaml_length = struct.unpack("<I", stream.read(4))[0]
-
-        # Read SQLite offset (8 bytes)
-        sqlite_offset = struct.unpack("<Q", stream.read(8))[0]
-
-        # Read encryption flags (1 byte) - skip for v0.1
-        stream.read(1)
-
-        # Skip reserved bytes (7 bytes)
-        stream.read(7)
-
         return {
             "version": version,
             "format_version": format_version,
@@ -131,25 +363,20 @@ class LLMCParser:
             "sqlite_offset": sqlite_offset,
         }
 
-    def _read_yaml_section(self, stream: BinaryIO, yaml_length: int) -> str:
+    def _read_yaml_section(self, stream: BinaryIO, yaml_length: int) -> bytes:
         """Read YAML section from stream."""
         yaml_data = stream.read(yaml_length)
         if len(yaml_data) != yaml_length:
             raise LLMCFormatError("Incomplete YAML section")
 
-        try:
-            # Handle potential null bytes at the beginning (JavaScript SDK compatibility)
-            yaml_text = yaml_data.decode("utf-8")
-            # Strip null bytes and whitespace from the beginning
-            yaml_text = yaml_text.lstrip('\x00').strip()
-            return yaml_text
-        except UnicodeDecodeError as e:
-            raise LLMCFormatError(f"Invalid UTF-8 in YAML section: {e}") from e
-
-    def _parse_metadata(self, yaml_data: str) -> LLMCMetadata:
+        # Strip leading null bytes (JavaScript SDK compatibility) and whitespace.
+        # The YAML loader decodes the UTF-8 bytes itself.
+        return yaml_data.lstrip(b"\x00").strip()
+
+    def _parse_metadata(self, yaml_data: bytes) -> LLMCMetadata:
         """Parse YAML metadata."""
         try:
-            data = yaml.safe_load(yaml_data)
+            data = yaml.load(yaml_data, Loader=_SafeLoader)
             if not isinstance(data, dict):
                 raise LLMCFormatError("YAML metadata must be a dictionary")
 
@@ -160,203 +387,353 @@ class LLMCParser:
                 data["created_at"] = data.pop("created")
 
             # Handle participants field - JavaScript SDK uses different format
+            participants = data.get("participants")
             if "participants" not in data:
                 # Try to infer participants from other fields or set default
                 data["participants"] = ["user", "assistant"]
-            elif isinstance(data["participants"], list) and len(data["participants"]) > 0:
+            elif isinstance(participants, list) and participants and isinstance(participants[0], dict):
                 # JavaScript SDK uses objects with role/name/identifier
                 # Convert to simple list of roles for compatibility
-                if isinstance(data["participants"][0], dict):
-                    roles = []
-                    for participant in data["participants"]:
-                        if "role" in participant:
-                            roles.append(participant["role"])
-                    if roles:
-                        data["participants"] = roles
+                roles = [p["role"] for p in participants if "role" in p]
+                if roles:
+                    data["participants"] = roles
 
             # Validate required fields
-            required_fields = ["version", "created_at", "participants"]
-            for field in required_fields:
-                if field not in data:
-                    raise LLMCFormatError(f"Missing required field: {field}")
+            missing = LLMC_REQUIRED_METADATA_FIELDS.difference(data)
+            if missing:
+                raise LLMCFormatError(f"Missing required field: {', '.join(sorted(missing))}")
 
             return data  # type: ignore
 
         except yaml.YAMLError as e:
             raise LLMCFormatError(f"Invalid YAML metadata: {e}") from e
 
-    def _parse_sqlite_data(self, sqlite_data: bytes) -> tuple[list[LLMCMessage], list[LLMCAttachment]]:
+    def _parse_sqlite_data(
+        self, sqlite_data: _ReadableBuffer
+    ) -> tuple[Union[list[LLMCMessage], LLMCMessageColumns], list[LLMCAttachment]]:
         """Parse SQLite database section."""
-        # Write SQLite data to temporary file
-        import tempfile
-        import os
-
-        with tempfile.NamedTemporaryFile(delete=False) as tmp_file:
-            tmp_file.write(sqlite_data)
-            tmp_path = tmp_file.name
+        if not len(sqlite_data):
+            raise LLMCFormatError("Missing SQLite section")
 
         try:
-            # Connect to SQLite file
-            conn = sqlite3.connect(tmp_path)
+            with self._open_sqlite(sqlite_data) as conn:
+                # Verify application ID
+                cursor = conn.execute("PRAGMA application_id;")
+                app_id = cursor.fetchone()[0]
+                if app_id != SQLITE_APPLICATION_ID:
+                    raise LLMCFormatError(f"Invalid SQLite application ID: {app_id:#x}")
 
-            # Verify application ID
-            cursor = conn.execute("PRAGMA application_id;")
-            app_id = cursor.fetchone()[0]
-            if app_id != SQLITE_APPLICATION_ID:
-                raise LLMCFormatError(f"Invalid SQLite application ID: {app_id:#x}")
+                schema = self._detect_schema(conn)
 
-            # Parse messages
-            messages = self._parse_messages(conn)
+                # Parse messages
+                messages = self._parse_messages(conn, schema)
 
-            # Parse attachments
-            attachments = self._parse_attachments(conn)
+                # Parse attachments
+                attachments = self._parse_attachments(conn, schema)
 
-            return messages, attachments
+                return messages, attachments
 
         except sqlite3.Error as e:
             raise LLMCFormatError(f"SQLite parsing error: {e}") from e
+
+    @contextmanager
+    def _open_sqlite(self, sqlite_data: _ReadableBuffer) -> Iterator[sqlite3.Connection]:
+        """Open the embedded SQLite database read-only.
+
+        On Python 3.11+ the bytes are deserialized straight into an in-memory
+        database; older versions go through a temporary file (on tmpfs where
+        available) opened as an immutable URI, so SQLite skips locking and
+        journal checks.
+        """
+        if _HAS_DESERIALIZE:
+            # Lazy attachments may read their BLOBs from any thread
+            conn = sqlite3.connect(":memory:", check_same_thread=not self._lazy_blobs)
+            try:
+                conn.deserialize(sqlite_data)  # type: ignore[attr-defined, unused-ignore]
+                self._configure_connection(conn)
+                yield conn
+            except BaseException:
+                conn.close()
+                raise
+            # In lazy mode _parse_lazy_attachments hands the connection to a
+            # _BlobReader, which closes it
+            if not self._lazy_blobs:
+                conn.close()
+            return
+
+        try:
+            tmp_path = _write_temp_file(sqlite_data, TMPFS_DIR)
+        except OSError:
+            if TMPFS_DIR is None:
+                raise
+            # tmpfs is full; use the default temporary directory
+            tmp_path = _write_temp_file(sqlite_data, None)
+
+        try:
+            uri = f"{Path(tmp_path).as_uri()}?mode=ro&immutable=1"
+            conn = sqlite3.connect(uri, uri=True)
+            try:
+                self._configure_connection(conn)
+                # Serve reads from the page cache instead of copying via read()
+                conn.execute("PRAGMA mmap_size = 268435456;")  # 256 MB
+                yield conn
+            finally:
+                conn.close()
         finally:
-            conn.close()
             os.unlink(tmp_path)
 
-    def _parse_messages(self, conn: sqlite3.Connection) -> list[LLMCMessage]:
-        """Parse messages from SQLite database (supports both schemas)."""
-        # Try JavaScript SDK schema first
-        try:
-            cursor = conn.execute("""
-                SELECT m.id, m.role, m.content, m.timestamp, m.parent_id, m.metadata,
-                       GROUP_CONCAT(a.id) as attachment_ids
-                FROM messages m
-                LEFT JOIN attachments a ON a.message_id = m.id
-                GROUP BY m.id, m.role, m.content, m.timestamp, m.parent_id, m.metadata
-                ORDER BY m.sequence, m.timestamp
-            """)
-
-            messages = []
-            for row in cursor:
-                message: LLMCMessage = {
-                    "id": f"msg_{row[0]}",  # Convert to string ID
-                    "role": row[1],
-                    "content": row[2],
-                    "timestamp": row[3],
-                }
+    @property
+    def _lazy_blobs(self) -> bool:
+        """Whether attachment BLOBs are read on demand.
 
-                if row[4] is not None:
-                    message["parent_id"] = f"msg_{row[4]}"
+        Only the in-memory database outlives the parse; the temporary file
+        used without deserialize() is removed once parsing finishes.
+        """
+        return self.lazy_attachments and _HAS_BLOBOPEN and _HAS_DESERIALIZE
+
+    def _configure_connection(self, conn: sqlite3.Connection) -> None:
+        """Apply read-only tuning PRAGMAs to a freshly opened connection."""
+        conn.execute("PRAGMA query_only = 1;")
+        conn.execute("PRAGMA temp_store = MEMORY;")
+        conn.execute("PRAGMA cache_size = -20000;")  # ~20 MB page cache
+
+    def _detect_schema(self, conn: sqlite3.Connection) -> str:
+        """Detect which SDK's database schema the file uses."""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(messages);")}
+        if not columns:
+            raise LLMCFormatError("Unsupported database schema: no messages table")
+
+        # Only the JavaScript SDK schema orders messages by an explicit sequence
+        return _SCHEMA_JS if "sequence" in columns else _SCHEMA_PY
+
+    def _parse_messages(
+        self, conn: sqlite3.Connection, schema: str
+    ) -> Union[list[LLMCMessage], LLMCMessageColumns]:
+        """Parse messages from SQLite database."""
+        if self.columnar_messages:
+            return self._parse_message_columns(conn, schema)
+
+        messages: list[LLMCMessage] = []
+
+        # Local aliases avoid global/attribute lookups in the row loops
+        append = messages.append
+        loads = _json_loads
+
+        if schema == _SCHEMA_JS:
+            attachment_ids = self._attachment_ids_by_message(conn)
+
+            rows = conn.execute(_MESSAGES_SQL_JS).fetchall()
+            for msg_id, role, content, timestamp, parent_id, metadata in rows:
+                # Build the common shapes in one literal (string IDs for JS rows)
+                message: LLMCMessage
+                if parent_id is None:
+                    message = {
+                        "id": f"msg_{msg_id}",
+                        "role": role,
+                        "content": content,
+                        "timestamp": timestamp,
+                    }
+                else:
+                    message = {
+                        "id": f"msg_{msg_id}",
+                        "role": role,
+                        "content": content,
+                        "timestamp": timestamp,
+                        "parent_id": f"msg_{parent_id}",
+                    }
 
-                if row[6]:  # attachment_ids
-                    attachment_ids = [f"att_{aid}" for aid in row[6].split(',') if aid]
-                    if attachment_ids:
-                        message["attachments"] = attachment_ids
+                if msg_id in attachment_ids:
+                    message["attachments"] = attachment_ids[msg_id]
 
-                if row[5]:  # metadata
-                    import json
+                if metadata:
                     try:
-                        message["metadata"] = json.loads(row[5])
+                        message["metadata"] = loads(metadata)
                     except json.JSONDecodeError:
                         pass
 
-                messages.append(message)
+                append(message)
 
             return messages
 
-        except sqlite3.OperationalError:
-            # Fall back to Python SDK schema
-            try:
-                cursor = conn.execute("""
-                    SELECT id, role, content, timestamp, parent_id, attachments, metadata
-                    FROM messages
-                    ORDER BY timestamp
-                """)
-
-                messages = []
-                for row in cursor:
-                    message: LLMCMessage = {
-                        "id": row[0],
-                        "role": row[1],
-                        "content": row[2],
-                        "timestamp": row[3],
-                    }
-
-                    if row[4] is not None:
-                        message["parent_id"] = row[4]
-
-                    if row[5]:
-                        # Parse JSON array of attachment IDs
-                        import json
-                        message["attachments"] = json.loads(row[5])
+        rows = conn.execute(_MESSAGES_SQL_PY).fetchall()
+        for msg_id, role, content, timestamp, parent_id, attachments, metadata in rows:
+            if parent_id is None:
+                message = {
+                    "id": msg_id,
+                    "role": role,
+                    "content": content,
+                    "timestamp": timestamp,
+                }
+            else:
+                message = {
+                    "id": msg_id,
+                    "role": role,
+                    "content": content,
+                    "timestamp": timestamp,
+                    "parent_id": parent_id,
+                }
 
-                    if row[6]:
-                        # Parse JSON metadata
-                        import json
-                        message["metadata"] = json.loads(row[6])
+            if attachments:
+                # Parse JSON array of attachment IDs
+                message["attachments"] = loads(attachments)
+
+            if metadata:
+                # Parse JSON metadata
+                message["metadata"] = loads(metadata)
+
+            append(message)
+
+        return messages
+
+    def _parse_message_columns(self, conn: sqlite3.Connection, schema: str) -> LLMCMessageColumns:
+        """Parse messages from SQLite database into column lists."""
+        if schema == _SCHEMA_JS:
+            rows = conn.execute(_MESSAGES_SQL_JS).fetchall()
+            if not rows:
+                return LLMCMessageColumns()
+
+            attachment_ids = self._attachment_ids_by_message(conn)
+            msg_ids, roles, contents, timestamps, parent_ids, metadata = zip(*rows)
+            return LLMCMessageColumns(
+                ids=[f"msg_{msg_id}" for msg_id in msg_ids],
+                roles=list(roles),
+                contents=list(contents),
+                timestamps=list(timestamps),
+                parent_ids=[None if p is None else f"msg_{p}" for p in parent_ids],
+                attachments=[attachment_ids.get(msg_id) for msg_id in msg_ids],
+                metadata=[_loads_lenient(m) for m in metadata],
+            )
+
+        rows = conn.execute(_MESSAGES_SQL_PY).fetchall()
+        if not rows:
+            return LLMCMessageColumns()
+
+        msg_ids, roles, contents, timestamps, parent_ids, attachments, metadata = zip(*rows)
+        return LLMCMessageColumns(
+            ids=list(msg_ids),
+            roles=list(roles),
+            contents=list(contents),
+            timestamps=list(timestamps),
+            parent_ids=list(parent_ids),
+            attachments=[_json_loads(a) if a else None for a in attachments],
+            metadata=[_json_loads(m) if m else None for m in metadata],
+        )
+
+    def _attachment_ids_by_message(self, conn: sqlite3.Connection) -> dict:
+        """Map message IDs to their attachment IDs (JavaScript SDK schema)."""
+        try:
+            cursor = conn.execute(_ATTACHMENT_IDS_SQL_JS)
+        except sqlite3.OperationalError:
+            # No attachments table
+            return {}
 
-                    messages.append(message)
+        return {
+            message_id: [f"att_{row[1]}" for row in group]
+            for message_id, group in groupby(cursor, key=itemgetter(0))
+        }
 
-                return messages
+    def _parse_attachments(self, conn: sqlite3.Connection, schema: str) -> list[LLMCAttachment]:
+        """Parse attachments from SQLite database."""
+        if self._lazy_blobs:
+            return self._parse_lazy_attachments(conn, schema)
 
-            except sqlite3.OperationalError as e:
-                raise LLMCFormatError(f"Unsupported database schema: {e}") from e
+        attachments: list[LLMCAttachment] = []
+        append = attachments.append
+        loads = _json_loads
 
-    def _parse_attachments(self, conn: sqlite3.Connection) -> list[LLMCAttachment]:
-        """Parse attachments from SQLite database (supports both schemas)."""
         try:
-            # Try JavaScript SDK schema first
-            cursor = conn.execute("""
-                SELECT id, filename, content_type, size, data, checksum, metadata
-                FROM attachments
-            """)
-
-            attachments = []
-            for row in cursor:
+            if schema == _SCHEMA_JS:
+                rows = conn.execute(_ATTACHMENTS_SQL_JS).fetchall()
+            else:
+                rows = conn.execute(_ATTACHMENTS_SQL_PY).fetchall()
+        except sqlite3.OperationalError:
+            # No attachments table
+            return attachments
+
+        if schema == _SCHEMA_JS:
+            for att_id, filename, content_type, size, data, metadata in rows:
                 attachment: LLMCAttachment = {
-                    "id": f"att_{row[0]}",  # Convert to string ID
-                    "filename": row[1],
-                    "content_type": row[2],
-                    "size": row[3],
-                    "data": row[4],
+                    "id": f"att_{att_id}",  # Convert to string ID
+                    "filename": filename,
+                    "content_type": content_type,
+                    "size": size,
+                    "data": data,
                 }
 
-                if row[6]:  # metadata
-                    import json
+                if metadata:
                     try:
-                        attachment["metadata"] = json.loads(row[6])
+                        attachment["metadata"] = loads(metadata)
                     except json.JSONDecodeError:
                         pass
 
-                attachments.append(attachment)
+                append(attachment)
 
             return attachments
 
+        for att_id, filename, content_type, size, data, created_at, metadata in rows:
+            attachment = {
+                "id": att_id,
+                "filename": filename,
+                "content_type": content_type,
+                "size": size,
+                "data": data,
+            }
+
+            if created_at:
+                attachment["created_at"] = created_at
+
+            if metadata:
+                attachment["metadata"] = loads(metadata)
+
+            append(attachment)
+
+        return attachments
+
+    def _parse_lazy_attachments(self, conn: sqlite3.Connection, schema: str) -> list[LLMCAttachment]:
+        """Parse attachment rows without their BLOBs (see ``_LazyAttachment``).
+
+        Attachments whose data is not a BLOB are returned as plain dicts.
+        Takes ownership of ``conn``: it is closed here when there is nothing
+        to read lazily, and otherwise once the attachments are freed.
+        """
+        attachments: list[LLMCAttachment] = []
+        append = attachments.append
+        is_js = schema == _SCHEMA_JS
+        reader = _BlobReader(conn)
+        has_blobs = False
+
+        try:
+            rows = conn.execute(
+                _LAZY_ATTACHMENTS_SQL_JS if is_js else _LAZY_ATTACHMENTS_SQL_PY
+            ).fetchall()
         except sqlite3.OperationalError:
-            # Try Python SDK schema
-            try:
-                cursor = conn.execute("""
-                    SELECT id, filename, content_type, size, data, created_at, metadata
-                    FROM attachments
-                """)
-
-                attachments = []
-                for row in cursor:
-                    attachment: LLMCAttachment = {
-                        "id": row[0],
-                        "filename": row[1],
-                        "content_type": row[2],
-                        "size": row[3],
-                        "data": row[4],
-                    }
+            # No attachments table
+            rows = []
+
+        for att_id, filename, content_type, size, rowid, data, created_at, metadata in rows:
+            fields = {
+                "id": f"att_{att_id}" if is_js else att_id,
+                "filename": filename,
+                "content_type": content_type,
+                "size": size,
+                "data": data if rowid is None else _NOT_LOADED,
+            }
 
-                    if row[5]:
-                        attachment["created_at"] = row[5]
+            if created_at:
+                fields["created_at"] = created_at
 
-                    if row[6]:
-                        import json
-                        attachment["metadata"] = json.loads(row[6])
+            if metadata:
+                decoded = _loads_lenient(metadata) if is_js else _json_loads(metadata)
+                if decoded is not None:
+                    fields["metadata"] = decoded
 
-                    attachments.append(attachment)
+            if rowid is None:
+                append(fields)  # type: ignore[arg-type]
+            else:
+                has_blobs = True
+                append(_LazyAttachment(fields, reader, rowid))  # type: ignore[arg-type]
 
-                return attachments
+        if not has_blobs:
+            reader.close()
 
-            except sqlite3.OperationalError:
-                # No attachments table
-                return []
+        return attachments
@@ -2,9 +2,11 @@
 
 from __future__ import annotations
 
+import os
+import struct
 import sys
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, Iterator, List, Literal, Optional, Sequence, Union, overload
 
 if sys.version_info >= (3, 11):
     from typing import NotRequired, TypedDict
@@ -16,13 +18,14 @@ __all__ = [
     "LLMCMessage", 
     "LLMCAttachment",
     "LLMCConversation",
+    "LLMCMessageColumns",
     "MessageRole",
     "AttachmentType",
 ]
 
 # Type aliases
-MessageRole = Union["user", "assistant", "system", "function"]
-AttachmentType = Union["image", "audio", "video", "document", "other"]
+MessageRole = Literal["user", "assistant", "system", "function"]
+AttachmentType = Literal["image", "audio", "video", "document", "other"]
 
 
 class LLMCMetadata(TypedDict):
@@ -62,11 +65,106 @@ class LLMCMessage(TypedDict):
     metadata: NotRequired[Dict[str, Any]]
 
 
+class LLMCMessageColumns(Sequence[LLMCMessage]):
+    """Column-oriented message storage.
+
+    Holds one list per message field instead of one dict per message, which
+    keeps large conversations compact and lets callers scan a single field
+    (e.g. ``contents``) without touching the others. Indexing or iterating
+    materializes ``LLMCMessage`` dicts on demand; they are built afresh each
+    time, so changes to them are not stored (edit the columns instead).
+
+    Optional fields are ``None`` in their column when a message lacks them.
+    """
+
+    __slots__ = (
+        "ids",
+        "roles",
+        "contents",
+        "timestamps",
+        "parent_ids",
+        "attachments",
+        "metadata",
+    )
+
+    def __init__(
+        self,
+        ids: Optional[List[str]] = None,
+        roles: Optional[List[MessageRole]] = None,
+        contents: Optional[List[str]] = None,
+        timestamps: Optional[List[str]] = None,
+        parent_ids: Optional[List[Optional[str]]] = None,
+        attachments: Optional[List[Optional[List[str]]]] = None,
+        metadata: Optional[List[Optional[Dict[str, Any]]]] = None,
+    ) -> None:
+        self.ids = ids if ids is not None else []
+        self.roles = roles if roles is not None else []
+        self.contents = contents if contents is not None else []
+        self.timestamps = timestamps if timestamps is not None else []
+        self.parent_ids = parent_ids if parent_ids is not None else []
+        self.attachments = attachments if attachments is not None else []
+        self.metadata = metadata if metadata is not None else []
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @overload
+    def __getitem__(self, index: int) -> LLMCMessage: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[LLMCMessage]: ...
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[LLMCMessage, List[LLMCMessage]]:
+        if isinstance(index, slice):
+            return [self._message(i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("message index out of range")
+        return self._message(index)
+
+    def __iter__(self) -> Iterator[LLMCMessage]:
+        for i in range(len(self)):
+            yield self._message(i)
+
+    def __eq__(self, other: object) -> bool:
+        # Equal to the list of message dicts it materializes, like a list
+        if isinstance(other, (LLMCMessageColumns, list)):
+            return list(self) == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        columns = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({columns})"
+
+    def _message(self, index: int) -> LLMCMessage:
+        message: LLMCMessage = {
+            "id": self.ids[index],
+            "role": self.roles[index],
+            "content": self.contents[index],
+            "timestamp": self.timestamps[index],
+        }
+
+        parent_id = self.parent_ids[index]
+        if parent_id is not None:
+            message["parent_id"] = parent_id
+
+        attachments = self.attachments[index]
+        if attachments:
+            message["attachments"] = attachments
+
+        metadata = self.metadata[index]
+        if metadata:
+            message["metadata"] = metadata
+
+        return message
+
+
 class LLMCConversation(TypedDict):
     """Complete LLMC conversation structure."""
     
     metadata: LLMCMetadata
-    messages: List[LLMCMessage]
+    messages: Union[List[LLMCMessage], LLMCMessageColumns]
     attachments: NotRequired[List[LLMCAttachment]]
 
 
@@ -76,6 +174,20 @@ LLMC_VERSION = 1
 LLMC_FORMAT_VERSION = 1
 SQLITE_APPLICATION_ID = 0x4C4C4D43  # "LLMC" in hex
 
+# Metadata fields every LLMC file must carry
+LLMC_REQUIRED_METADATA_FIELDS = frozenset(("version", "created_at", "participants"))
+LLMC_REQUIRED_MESSAGE_FIELDS = frozenset(("id", "role", "content", "timestamp"))
+
+# 32-byte file header: magic, version, 3 reserved, format version,
+# YAML length, SQLite offset, encryption flags, 7 reserved
+LLMC_HEADER_STRUCT = struct.Struct("<4sB3xIIQB7x")
+
+# RAM-backed directory for the temporary database used without SQLite's
+# serialize()/deserialize(), unless TMPDIR chooses where temporary files go.
+# tmpfs can be small (64 MB in a default Docker container), so callers retry
+# in the default temporary directory when it is full.
+TMPFS_DIR = "/dev/shm" if "TMPDIR" not in os.environ and os.path.isdir("/dev/shm") else None
+
 
 class LLMCError(Exception):
     """Base exception for LLMC-related errors."""
@@ -1,27 +1,120 @@
 """LLMC file writer implementation."""
 
 import json
+import math
+import mmap
 import sqlite3
-import struct
 import tempfile
+from contextlib import contextmanager
 from datetime import datetime
+from itertools import groupby
 from pathlib import Path
-from typing import BinaryIO, Union
+from typing import IO, Any, BinaryIO, Iterator, Optional, Sequence, Union
 
 import yaml
 
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None  # type: ignore[assignment]
+
+try:
+    from yaml import CSafeDumper as _SafeDumper
+except ImportError:  # PyYAML built without libyaml
+    from yaml import SafeDumper as _SafeDumper  # type: ignore[assignment]
+
 from .types import (
+    LLMC_HEADER_STRUCT,
     LLMC_MAGIC,
+    LLMC_REQUIRED_MESSAGE_FIELDS,
+    LLMC_REQUIRED_METADATA_FIELDS,
     LLMC_VERSION,
     LLMC_FORMAT_VERSION,
     SQLITE_APPLICATION_ID,
+    TMPFS_DIR,
     LLMCConversation,
     LLMCFormatError,
+    LLMCMessageColumns,
     LLMCValidationError,
 )
 
 __all__ = ["LLMCWriter"]
 
+_HAS_SERIALIZE = hasattr(sqlite3.Connection, "serialize")
+_HAS_BLOBOPEN = hasattr(sqlite3.Connection, "blobopen")
+
+_MESSAGES_INSERT_SQL = """
+    INSERT INTO messages (id, role, content, timestamp, parent_id, attachments, metadata)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+_ATTACHMENTS_INSERT_SQL = """
+    INSERT INTO attachments (id, filename, content_type, size, data, created_at, metadata)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+# Large BLOBs are inserted as a placeholder and filled in via blobopen()
+_ATTACHMENTS_INSERT_ZEROBLOB_SQL = """
+    INSERT INTO attachments (id, filename, content_type, size, data, created_at, metadata)
+    VALUES (?, ?, ?, ?, zeroblob(?), ?, ?)
+"""
+_CACHED_STATEMENTS = 256
+
+# Attachments larger than this are streamed into SQLite in chunks of this size
+_BLOB_CHUNK_SIZE = 1 << 20
+
+# Output buffer size for write_file
+_WRITE_BUFFER_SIZE = 1 << 20
+
+# Largest database image copied into the same write as the header
+_COALESCE_LIMIT = 1 << 20
+
+
+def _is_plain_json(obj: Any) -> bool:
+    """Whether orjson encodes obj to the same JSON value as json.dumps.
+
+    orjson also encodes UUIDs, enums, dates and non-str keys, which
+    json.dumps refuses, writes NaN and infinities as ``null`` and rejects
+    integers outside the 64-bit range; only exact builtin types pass.
+    """
+    cls = type(obj)
+    if cls is str or cls is bool or obj is None:
+        return True
+    if cls is int:
+        return bool(-(1 << 63) <= obj < (1 << 64))
+    if cls is float:
+        return math.isfinite(obj)
+    if cls is dict:
+        return all(type(key) is str and _is_plain_json(value) for key, value in obj.items())
+    if cls is list or cls is tuple:
+        return all(map(_is_plain_json, obj))
+    return False
+
+
+def _json_dumps(obj: Any) -> str:
+    """Encode a JSON column, with orjson when it writes what json.dumps would.
+
+    Everything else goes to ``json.dumps``, so the same values are written
+    (or refused) whether or not orjson is installed.
+    """
+    if orjson is not None and _is_plain_json(obj):
+        try:
+            # As str, so SQLite stores TEXT rather than BLOB
+            return orjson.dumps(obj).decode("utf-8")
+        except orjson.JSONEncodeError:
+            # Lone surrogates, and nesting deeper than orjson allows
+            pass
+    return json.dumps(obj)
+
+
+def _is_streamed_attachment(attachment: dict) -> bool:
+    """Whether an attachment's BLOB is large enough to stream into SQLite."""
+    data = attachment["data"]
+    # Other values (e.g. str, stored as TEXT) are bound as parameters
+    return (
+        _HAS_BLOBOPEN
+        and isinstance(data, (bytes, bytearray, memoryview))
+        and len(data) > _BLOB_CHUNK_SIZE
+    )
+
 
 class LLMCWriter:
     """Writer for LLMC files."""
@@ -42,7 +135,7 @@ class LLMCWriter:
             LLMCFormatError: If writing fails
         """
         try:
-            with open(file_path, "wb") as f:
+            with open(file_path, "wb", buffering=_WRITE_BUFFER_SIZE) as f:
                 self.write_stream(conversation, f)
         except (OSError, IOError) as e:
             raise LLMCFormatError(f"Failed to write file {file_path}: {e}") from e
@@ -66,21 +159,21 @@ class LLMCWriter:
             yaml_data = self._generate_yaml(conversation["metadata"])
             yaml_bytes = yaml_data.encode("utf-8")
             
-            # Generate SQLite database
-            sqlite_data = self._generate_sqlite(conversation)
-            
-            # Calculate offsets
-            header_size = 32  # According to LLMC specification: 32-byte header
-            sqlite_offset = header_size + len(yaml_bytes)
-            
-            # Write header
-            self._write_header(stream, len(yaml_bytes), sqlite_offset)
-            
-            # Write YAML section
-            stream.write(yaml_bytes)
-            
-            # Write SQLite section
-            stream.write(sqlite_data)
+            # Generate SQLite database (fully built before anything is written)
+            with self._generate_sqlite(conversation) as sqlite_data:
+                # Calculate offsets
+                sqlite_offset = LLMC_HEADER_STRUCT.size + len(yaml_bytes)
+
+                # Header and YAML section go out in one write
+                prefix = self._pack_header(len(yaml_bytes), sqlite_offset) + yaml_bytes
+
+                # Write SQLite section; only small images are worth copying
+                # to save the extra write
+                if len(sqlite_data) <= _COALESCE_LIMIT:
+                    stream.write(prefix + sqlite_data)
+                else:
+                    stream.write(prefix)
+                    stream.write(sqlite_data)
             
         except Exception as e:
             if isinstance(e, (LLMCValidationError, LLMCFormatError)):
@@ -99,53 +192,36 @@ class LLMCWriter:
             raise LLMCValidationError("Missing messages section")
         
         # Validate metadata
-        metadata = conversation["metadata"]
-        required_fields = ["version", "created_at", "participants"]
-        for field in required_fields:
-            if field not in metadata:
-                raise LLMCValidationError(f"Missing required metadata field: {field}")
+        missing = LLMC_REQUIRED_METADATA_FIELDS.difference(conversation["metadata"])
+        if missing:
+            raise LLMCValidationError(
+                f"Missing required metadata field: {', '.join(sorted(missing))}"
+            )
         
-        # Validate messages
-        messages = conversation["messages"]
-        if not isinstance(messages, list):
+        # Validate messages; each one is checked as its row is built
+        # (see _message_rows)
+        if not isinstance(conversation["messages"], (list, LLMCMessageColumns)):
             raise LLMCValidationError("Messages must be a list")
-        
-        for i, message in enumerate(messages):
-            if not isinstance(message, dict):
-                raise LLMCValidationError(f"Message {i} must be a dictionary")
-            
-            required_msg_fields = ["id", "role", "content", "timestamp"]
-            for field in required_msg_fields:
-                if field not in message:
-                    raise LLMCValidationError(f"Message {i} missing required field: {field}")
-
-    def _write_header(self, stream: BinaryIO, yaml_length: int, sqlite_offset: int) -> None:
-        """Write LLMC file header (32 bytes according to specification)."""
-        # Magic header (8 bytes): "LLMC\x01\x00\x00\x00"
-        stream.write(LLMC_MAGIC)  # "LLMC" (4 bytes)
-        stream.write(struct.pack("<B", LLMC_VERSION))  # Version 1 (1 byte)
-        stream.write(b"\x00\x00\x00")  # Reserved (3 bytes)
-
-        # Format version (4 bytes)
-        stream.write(struct.pack("<I", LLMC_FORMAT_VERSION))
-
-        # YAML length (4 bytes)
-        stream.write(struct.pack("<I", yaml_length))
-
-        # SQLite offset (8 bytes)
-        stream.write(struct.pack("<Q", sqlite_offset))
-
-        # Encryption flags (1 byte) - no encryption in v0.1
-        stream.write(b"\x00")
 
-        # Reserved (7 bytes) - all zeros
-        stream.write(b"\x00\x00\x00\x00\x00\x00\x00")
+    def _pack_header(self, yaml_length: int, sqlite_offset: int) -> bytes:
+        """Pack LLMC file header (32 bytes according to specification)."""
+        # Reserved bytes are zero-filled by the struct's pad bytes;
+        # encryption flags are 0 (no encryption in v0.1)
+        return LLMC_HEADER_STRUCT.pack(
+            LLMC_MAGIC,
+            LLMC_VERSION,
+            LLMC_FORMAT_VERSION,
+            yaml_length,
+            sqlite_offset,
+            0,
+        )
 
     def _generate_yaml(self, metadata: dict) -> str:
         """Generate YAML metadata section."""
         try:
             return yaml.dump(
                 metadata,
+                Dumper=_SafeDumper,
                 default_flow_style=False,
                 allow_unicode=True,
                 sort_keys=False,
@@ -153,43 +229,118 @@ class LLMCWriter:
         except yaml.YAMLError as e:
             raise LLMCFormatError(f"Failed to generate YAML: {e}") from e
 
-    def _generate_sqlite(self, conversation: LLMCConversation) -> bytes:
-        """Generate SQLite database section."""
-        # Create temporary database
-        with tempfile.NamedTemporaryFile() as tmp_file:
-            conn = sqlite3.connect(tmp_file.name)
-            
-            try:
-                # Set application ID
-                conn.execute(f"PRAGMA application_id = {SQLITE_APPLICATION_ID};")
-                
-                # Create schema
-                self._create_schema(conn)
-                
-                # Insert data
-                self._insert_messages(conn, conversation["messages"])
-                
-                if "attachments" in conversation:
-                    self._insert_attachments(conn, conversation["attachments"])
-                
-                # Commit changes
-                conn.commit()
-                
-                # Read database file
-                conn.close()
-                with open(tmp_file.name, "rb") as f:
-                    return f.read()
-                    
-            except sqlite3.Error as e:
-                raise LLMCFormatError(f"SQLite generation error: {e}") from e
-            finally:
+    @contextmanager
+    def _generate_sqlite(self, conversation: LLMCConversation) -> Iterator[Union[bytes, mmap.mmap]]:
+        """Generate SQLite database section.
+
+        On Python 3.11+ the database is built in memory and yields its
+        serialized bytes. Older versions build it in a temporary file (on
+        tmpfs where available) and yield a read-only memory map of it, so it
+        is written out from the page cache rather than read into Python.
+        """
+        try:
+            if _HAS_SERIALIZE:
+                # Autocommit mode: the transaction is managed in _build_database
+                conn = sqlite3.connect(
+                    ":memory:",
+                    isolation_level=None,
+                    cached_statements=_CACHED_STATEMENTS,
+                )
                 try:
+                    self._build_database(conn, conversation)
+                    sqlite_data = conn.serialize()  # type: ignore[attr-defined, unused-ignore]
+                finally:
                     conn.close()
-                except:
-                    pass
 
-    def _create_schema(self, conn: sqlite3.Connection) -> None:
-        """Create SQLite database schema."""
+                yield sqlite_data
+                return
+
+            try:
+                tmp_file = self._build_temp_database(conversation, TMPFS_DIR)
+            except (OSError, sqlite3.OperationalError):
+                # A full disk is reported as "database or disk is full"
+                if TMPFS_DIR is None:
+                    raise
+                # tmpfs is full; use the default temporary directory
+                tmp_file = self._build_temp_database(conversation, None)
+
+            with tmp_file, mmap.mmap(tmp_file.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield mapped
+
+        except sqlite3.Error as e:
+            raise LLMCFormatError(f"SQLite generation error: {e}") from e
+
+    def _build_temp_database(
+        self, conversation: LLMCConversation, directory: Optional[str]
+    ) -> IO[bytes]:
+        """Build the database in a temporary file, returned open (it is deleted on close)."""
+        tmp_file = tempfile.NamedTemporaryFile(dir=directory)
+        try:
+            conn = sqlite3.connect(
+                tmp_file.name,
+                isolation_level=None,
+                cached_statements=_CACHED_STATEMENTS,
+            )
+            try:
+                self._build_database(conn, conversation)
+            finally:
+                conn.close()
+        except BaseException:
+            tmp_file.close()
+            raise
+        return tmp_file
+
+    def _build_database(self, conn: sqlite3.Connection, conversation: LLMCConversation) -> None:
+        """Create the schema and insert all conversation data."""
+        # Must run first: page_size only applies before page 1 is written
+        self._configure_connection(conn)
+
+        # Set application ID
+        conn.execute(f"PRAGMA application_id = {SQLITE_APPLICATION_ID};")
+
+        attachments = conversation.get("attachments")
+
+        # Build the whole database in a single transaction
+        conn.execute("BEGIN")
+        try:
+            # Create tables
+            self._create_tables(conn, with_attachments=bool(attachments))
+
+            # Insert data
+            self._insert_messages(conn, conversation["messages"])
+
+            if attachments:
+                self._insert_attachments(conn, attachments)
+
+            # Index the populated tables in one pass each
+            self._create_indexes(conn)
+
+            conn.execute("COMMIT")
+        except Exception:
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            raise
+
+    def _configure_connection(self, conn: sqlite3.Connection) -> None:
+        """Apply bulk-load PRAGMAs to the scratch database.
+
+        The database is built once and embedded as bytes, so durability
+        guarantees (journal file, fsync) buy nothing here.
+        """
+        # Fewer B-tree splits and overflow pages for long message contents
+        conn.execute("PRAGMA page_size = 8192;")
+        conn.execute("PRAGMA journal_mode = MEMORY;")
+        conn.execute("PRAGMA synchronous = OFF;")
+        conn.execute("PRAGMA temp_store = MEMORY;")
+        conn.execute("PRAGMA locking_mode = EXCLUSIVE;")
+        conn.execute("PRAGMA cache_size = -131072;")  # 128 MB page cache
+
+    def _create_tables(self, conn: sqlite3.Connection, with_attachments: bool = True) -> None:
+        """Create SQLite database tables.
+
+        The attachments table is optional: readers treat a missing table as
+        no attachments, and leaving it out keeps its pages out of the file.
+        """
         # Messages table
         conn.execute("""
             CREATE TABLE messages (
@@ -202,7 +353,10 @@ class LLMCWriter:
                 metadata TEXT
             );
         """)
-        
+
+        if not with_attachments:
+            return
+
         # Attachments table
         conn.execute("""
             CREATE TABLE attachments (
@@ -215,51 +369,87 @@ class LLMCWriter:
                 metadata TEXT
             );
         """)
-        
-        # Create indexes
+
+    def _create_indexes(self, conn: sqlite3.Connection) -> None:
+        """Create SQLite indexes (after bulk insert, so each is built once)."""
         conn.execute("CREATE INDEX idx_messages_timestamp ON messages(timestamp);")
         conn.execute("CREATE INDEX idx_messages_parent_id ON messages(parent_id);")
 
-    def _insert_messages(self, conn: sqlite3.Connection, messages: list) -> None:
+    def _insert_messages(self, conn: sqlite3.Connection, messages: Sequence[Any]) -> None:
         """Insert messages into database."""
-        for message in messages:
-            attachments_json = None
-            if "attachments" in message and message["attachments"]:
-                attachments_json = json.dumps(message["attachments"])
-            
-            metadata_json = None
-            if "metadata" in message and message["metadata"]:
-                metadata_json = json.dumps(message["metadata"])
-            
-            conn.execute("""
-                INSERT INTO messages (id, role, content, timestamp, parent_id, attachments, metadata)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
+        conn.executemany(_MESSAGES_INSERT_SQL, self._message_rows(messages))
+
+    def _message_rows(self, messages: Sequence[Any]) -> Iterator[tuple]:
+        """Validate each message and yield its row for the messages table."""
+        has_required_fields = LLMC_REQUIRED_MESSAGE_FIELDS.issubset
+
+        for i, message in enumerate(messages):
+            if not isinstance(message, dict):
+                raise LLMCValidationError(f"Message {i} must be a dictionary")
+
+            if not has_required_fields(message):
+                missing = LLMC_REQUIRED_MESSAGE_FIELDS.difference(message)
+                raise LLMCValidationError(
+                    f"Message {i} missing required field: {', '.join(sorted(missing))}"
+                )
+
+            # Optional fields are looked up once each, via assignment expressions
+            yield (
                 message["id"],
                 message["role"],
                 message["content"],
                 message["timestamp"],
                 message.get("parent_id"),
-                attachments_json,
-                metadata_json,
-            ))
+                _json_dumps(attachments) if (attachments := message.get("attachments")) else None,
+                _json_dumps(metadata) if (metadata := message.get("metadata")) else None,
+            )
 
     def _insert_attachments(self, conn: sqlite3.Connection, attachments: list) -> None:
-        """Insert attachments into database."""
-        for attachment in attachments:
-            metadata_json = None
-            if "metadata" in attachment and attachment["metadata"]:
-                metadata_json = json.dumps(attachment["metadata"])
-            
-            conn.execute("""
-                INSERT INTO attachments (id, filename, content_type, size, data, created_at, metadata)
-                VALUES (?, ?, ?, ?, ?, ?, ?)
-            """, (
-                attachment["id"],
-                attachment["filename"],
-                attachment["content_type"],
-                attachment["size"],
-                attachment["data"],
-                attachment.get("created_at"),
-                metadata_json,
-            ))
+        """Insert attachments into database, preserving their order.
+
+        On Python 3.11+ BLOBs larger than ``_BLOB_CHUNK_SIZE`` are written in
+        chunks through ``Connection.blobopen()``, so SQLite never holds a
+        transient copy of the whole value as it would for a bound parameter.
+        """
+        for streamed, group in groupby(attachments, key=_is_streamed_attachment):
+            if streamed:
+                for attachment in group:
+                    self._insert_streamed_attachment(conn, attachment)
+                continue
+
+            rows = (
+                (
+                    attachment["id"],
+                    attachment["filename"],
+                    attachment["content_type"],
+                    attachment["size"],
+                    attachment["data"],
+                    attachment.get("created_at"),
+                    _json_dumps(metadata) if (metadata := attachment.get("metadata")) else None,
+                )
+                for attachment in group
+            )
+
+            conn.executemany(_ATTACHMENTS_INSERT_SQL, rows)
+
+    def _insert_streamed_attachment(self, conn: sqlite3.Connection, attachment: dict) -> None:
+        """Insert one attachment, copying its BLOB in chunks."""
+        metadata = attachment.get("metadata")
+        with memoryview(attachment["data"]) as data:
+            cursor = conn.execute(
+                _ATTACHMENTS_INSERT_ZEROBLOB_SQL,
+                (
+                    attachment["id"],
+                    attachment["filename"],
+                    attachment["content_type"],
+                    attachment["size"],
+                    data.nbytes,
+                    attachment.get("created_at"),
+                    _json_dumps(metadata) if metadata else None,
+                ),
+            )
+            rowid = cursor.lastrowid
+            assert rowid is not None  # set by the INSERT just executed
+            with conn.blobopen("attachments", "data", rowid) as blob:  # type: ignore[attr-defined, unused-ignore]
+                for offset in range(0, data.nbytes, _BLOB_CHUNK_SIZE):
+                    blob.write(data[offset:offset + _BLOB_CHUNK_SIZE])
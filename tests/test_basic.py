@@ -1,8 +1,18 @@
 """Basic tests for LLMC Python SDK."""
 
+import io
+import json
+import math
+import sqlite3
+import struct
 import tempfile
-from datetime import datetime
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+from enum import Enum, IntEnum
 from pathlib import Path
+from types import MappingProxyType
 
 import pytest
 
@@ -10,8 +20,11 @@ from llmc_python import (
     LLMCParser,
     LLMCWriter,
     LLMCConversation,
+    LLMCFormatError,
     LLMCMessage,
+    LLMCMessageColumns,
     LLMCMetadata,
+    LLMCValidationError,
     parse_file,
     write_file,
 )
@@ -114,6 +127,468 @@ def test_convenience_functions():
         Path(tmp_path).unlink(missing_ok=True)
 
 
+def test_round_trip_with_attachments(tmp_path):
+    """Test writing and reading messages that reference attachments."""
+    conversation: LLMCConversation = {
+        "metadata": {
+            "version": "0.1",
+            "created_at": "2024-01-15T10:30:00Z",
+            "participants": ["user", "assistant"],
+        },
+        "messages": [
+            {
+                "id": "msg_1",
+                "role": "user",
+                "content": "See attached",
+                "timestamp": "2024-01-15T10:30:00Z",
+                "attachments": ["att_1"],
+                "metadata": {"client": "test"},
+            },
+        ],
+        "attachments": [
+            {
+                "id": "att_1",
+                "filename": "notes.txt",
+                "content_type": "text/plain",
+                "size": 5,
+                "data": b"hello",
+                "created_at": "2024-01-15T10:29:00Z",
+                "metadata": {"source": "upload"},
+            },
+        ],
+    }
+    file_path = tmp_path / "attachments.llmc"
+    write_file(conversation, str(file_path))
+
+    parsed = parse_file(str(file_path))
+
+    assert parsed["messages"] == conversation["messages"]
+    assert parsed["attachments"] == conversation["attachments"]
+
+    # Lazily loaded attachments compare, convert and iterate like eager ones
+    # before their data is read, and the data can be read from another thread
+    parser = LLMCParser(lazy_attachments=True)
+    expected = conversation["attachments"][0]
+    assert parser.parse_file(str(file_path))["attachments"] == [expected]
+    assert dict(parser.parse_file(str(file_path))["attachments"][0]) == expected
+
+    attachment = parser.parse_file(str(file_path))["attachments"][0]
+    assert list(attachment) == list(expected)
+    assert len(attachment) == len(expected)
+    assert "data" in attachment
+
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        lazy = pool.submit(parser.parse_file, str(file_path)).result()
+    assert lazy["attachments"][0]["data"] == b"hello"
+
+
+def test_round_trip_large_attachments(tmp_path):
+    """Test that large attachments round-trip in their original order."""
+    large = bytes(range(256)) * 12289  # a little over 3 MiB
+    attachments = [
+        {"id": f"att_{i}", "filename": f"{i}.bin", "content_type": "application/octet-stream",
+         "size": len(data), "data": data}
+        for i, data in enumerate([b"small", large, b"", large[::-1], "text" * (1 << 20)])
+    ]
+    conversation: LLMCConversation = {
+        "metadata": {
+            "version": "0.1",
+            "created_at": "2024-01-15T10:30:00Z",
+            "participants": ["user"],
+        },
+        "messages": [],
+        "attachments": attachments,
+    }
+    file_path = tmp_path / "large.llmc"
+    write_file(conversation, str(file_path))
+
+    assert parse_file(str(file_path))["attachments"] == attachments
+    assert LLMCParser(lazy_attachments=True).parse_file(str(file_path))["attachments"] == attachments
+
+
+@pytest.mark.parametrize("missing_tmpfs", [False, True])
+def test_round_trip_without_serialize(tmp_path, monkeypatch, missing_tmpfs):
+    """Test the temporary-file paths used before Python 3.11."""
+    import llmc_python.parser
+    import llmc_python.writer
+
+    monkeypatch.setattr(llmc_python.parser, "_HAS_DESERIALIZE", False)
+    monkeypatch.setattr(llmc_python.parser, "_HAS_BLOBOPEN", False)
+    monkeypatch.setattr(llmc_python.writer, "_HAS_SERIALIZE", False)
+    monkeypatch.setattr(llmc_python.writer, "_HAS_BLOBOPEN", False)
+    if missing_tmpfs:
+        # Temporary files fall back to tempfile's default directory
+        missing = str(tmp_path / "missing")
+        monkeypatch.setattr(llmc_python.parser, "TMPFS_DIR", missing)
+        monkeypatch.setattr(llmc_python.writer, "TMPFS_DIR", missing)
+
+    large = bytes(range(256)) * 8192  # 2 MiB
+    conversation: LLMCConversation = {
+        "metadata": {
+            "version": "0.1",
+            "created_at": "2024-01-15T10:30:00Z",
+            "participants": ["user", "assistant"],
+        },
+        "messages": [
+            {
+                "id": "msg_1",
+                "role": "user",
+                "content": "See attached",
+                "timestamp": "2024-01-15T10:30:00Z",
+                "attachments": ["att_1"],
+            },
+            {
+                "id": "msg_2",
+                "role": "assistant",
+                "content": "Thanks",
+                "timestamp": "2024-01-15T10:31:00Z",
+                "parent_id": "msg_1",
+            },
+        ],
+        "attachments": [
+            {
+                "id": "att_1",
+                "filename": "large.bin",
+                "content_type": "application/octet-stream",
+                "size": len(large),
+                "data": large,
+            },
+        ],
+    }
+    file_path = tmp_path / "fallback.llmc"
+    write_file(conversation, str(file_path))
+
+    assert parse_file(str(file_path)) == conversation
+    assert LLMCParser(lazy_attachments=True).parse_file(str(file_path)) == conversation
+
+
+def test_parse_stdlib_json_columns(tmp_path, monkeypatch):
+    """Test reading JSON that json.dumps wrote, including values orjson rejects."""
+    import llmc_python.writer
+
+    monkeypatch.setattr(llmc_python.writer, "_json_dumps", json.dumps)
+    conversation: LLMCConversation = {
+        "metadata": {
+            "version": "0.1",
+            "created_at": "2024-01-15T10:30:00Z",
+            "participants": ["user"],
+        },
+        "messages": [
+            {
+                "id": "msg_1",
+                "role": "user",
+                "content": "Hello",
+                "timestamp": "2024-01-15T10:30:00Z",
+                "metadata": {"score": float("nan"), "big": 2**70, "small": 1},
+            },
+        ],
+    }
+    file_path = tmp_path / "stdlib.llmc"
+    write_file(conversation, str(file_path))
+
+    metadata = parse_file(str(file_path))["messages"][0]["metadata"]
+    assert math.isnan(metadata["score"])
+    assert metadata["big"] == 2**70
+    assert isinstance(metadata["big"], int)
+    assert metadata["small"] == 1
+
+
+@pytest.mark.parametrize(
+    "bad_message, error",
+    [
+        ({"id": "msg_2", "role": "user", "content": "Hi"}, "Message 1 missing required field: timestamp"),
+        (
+            defaultdict(str, {"id": "msg_2", "role": "user", "content": "Hi"}),
+            "Message 1 missing required field: timestamp",
+        ),
+        (["msg_2", "user", "Hi"], "Message 1 must be a dictionary"),
+        (
+            MappingProxyType(
+                {"id": "msg_2", "role": "user", "content": "Hi", "timestamp": "2024-01-15T10:31:00Z"}
+            ),
+            "Message 1 must be a dictionary",
+        ),
+    ],
+)
+def test_write_invalid_message(bad_message, error):
+    """Test that invalid messages are reported and nothing is written."""
+    conversation = {
+        "metadata": {
+            "version": "0.1",
+            "created_at": "2024-01-15T10:30:00Z",
+            "participants": ["user"],
+        },
+        "messages": [
+            {"id": "msg_1", "role": "user", "content": "Hello", "timestamp": "2024-01-15T10:30:00Z"},
+            bad_message,
+        ],
+    }
+    stream = io.BytesIO()
+    with pytest.raises(LLMCValidationError, match=error):
+        LLMCWriter().write_stream(conversation, stream)
+    assert stream.getvalue() == b""
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_round_trip_json_edge_values(tmp_path, monkeypatch, use_orjson):
+    """Test that non-finite floats and big integers round-trip with or without orjson."""
+    import llmc_python.parser
+    import llmc_python.writer
+
+    if not use_orjson:
+        monkeypatch.setattr(llmc_python.parser, "orjson", None)
+        monkeypatch.setattr(llmc_python.writer, "orjson", None)
+
+    # One value per message, so a fallback for one cannot cover for another
+    values = {
+        "inf": float("inf"),
+        "neg_inf": float("-inf"),
+        "big": 2**70,
+        "below_int64": -(2**63) - 1,
+        "none": None,
+        "text": "plain",
+    }
+    conversation: LLMCConversation = {
+        "metadata": {
+            "version": "0.1",
+            "created_at": "2024-01-15T10:30:00Z",
+            "participants": ["user"],
+        },
+        "messages": [
+            {
+                "id": f"msg_{key}",
+                "role": "user",
+                "content": "Hello",
+                "timestamp": "2024-01-15T10:30:00Z",
+                "metadata": {key: value},
+            }
+            for key, value in [("nan", float("nan")), *values.items()]
+        ],
+    }
+    file_path = tmp_path / "edge.llmc"
+    write_file(conversation, str(file_path))
+
+    parsed = {}
+    for message in parse_file(str(file_path))["messages"]:
+        parsed.update(message["metadata"])
+    assert math.isnan(parsed.pop("nan"))
+    assert parsed == values
+    assert isinstance(parsed["big"], int)
+    assert isinstance(parsed["below_int64"], int)
+
+
+class _Color(Enum):
+    RED = 1
+
+
+class _Level(IntEnum):
+    HIGH = 2
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+@pytest.mark.parametrize(
+    "metadata, expected",
+    [
+        ({"id": uuid.UUID(int=1)}, None),
+        ({"color": _Color.RED}, None),
+        ({date(2024, 1, 15): 1}, None),
+        ({"level": _Level.HIGH}, {"level": 2}),
+        ({1: "one", None: "none"}, {"1": "one", "null": "none"}),
+        ({"pair": (1, 2), "surrogate": "\ud800"}, {"pair": [1, 2], "surrogate": "\ud800"}),
+    ],
+)
+def test_json_columns_independent_of_orjson(tmp_path, monkeypatch, use_orjson, metadata, expected):
+    """Test that the same values are written, or refused, with or without orjson."""
+    import llmc_python.parser
+    import llmc_python.writer
+
+    if not use_orjson:
+        monkeypatch.setattr(llmc_python.parser, "orjson", None)
+        monkeypatch.setattr(llmc_python.writer, "orjson", None)
+
+    conversation: LLMCConversation = {
+        "metadata": {
+            "version": "0.1",
+            "created_at": "2024-01-15T10:30:00Z",
+            "participants": ["user"],
+        },
+        "messages": [
+            {
+                "id": "msg_1",
+                "role": "user",
+                "content": "Hello",
+                "timestamp": "2024-01-15T10:30:00Z",
+                "metadata": metadata,
+            },
+        ],
+    }
+    file_path = tmp_path / "types.llmc"
+
+    if expected is None:
+        with pytest.raises(LLMCFormatError, match="not JSON serializable|keys must be"):
+            write_file(conversation, str(file_path))
+        return
+
+    write_file(conversation, str(file_path))
+    assert parse_file(str(file_path))["messages"][0]["metadata"] == expected
+
+
+def test_parse_blob_json_columns(tmp_path, monkeypatch):
+    """Test reading JSON columns stored as BLOBs rather than TEXT."""
+    import llmc_python.writer
+
+    monkeypatch.setattr(llmc_python.writer, "_json_dumps", lambda obj: json.dumps(obj).encode())
+    conversation: LLMCConversation = {
+        "metadata": {
+            "version": "0.1",
+            "created_at": "2024-01-15T10:30:00Z",
+            "participants": ["user"],
+        },
+        "messages": [
+            {
+                "id": "msg_1",
+                "role": "user",
+                "content": "Hello",
+                "timestamp": "2024-01-15T10:30:00Z",
+                "attachments": ["att_1"],
+                "metadata": {"big": 2**70},
+            },
+        ],
+    }
+    file_path = tmp_path / "blob_json.llmc"
+    write_file(conversation, str(file_path))
+
+    message = parse_file(str(file_path))["messages"][0]
+    assert message["attachments"] == ["att_1"]
+    assert message["metadata"] == {"big": 2**70}
+
+
+def test_columnar_messages(tmp_path):
+    """Test parsing messages into column lists."""
+    conversation: LLMCConversation = {
+        "metadata": {
+            "version": "0.1",
+            "created_at": "2024-01-15T10:30:00Z",
+            "participants": ["user", "assistant"],
+        },
+        "messages": [
+            {
+                "id": "msg_1",
+                "role": "user",
+                "content": "Hi",
+                "timestamp": "2024-01-15T10:30:00Z",
+            },
+            {
+                "id": "msg_2",
+                "role": "assistant",
+                "content": "Hello!",
+                "timestamp": "2024-01-15T10:30:05Z",
+                "parent_id": "msg_1",
+                "metadata": {"model": "x"},
+            },
+        ],
+    }
+    file_path = tmp_path / "columns.llmc"
+    write_file(conversation, str(file_path))
+
+    messages = LLMCParser(columnar_messages=True).parse_file(file_path)["messages"]
+
+    assert isinstance(messages, LLMCMessageColumns)
+    assert messages.contents == ["Hi", "Hello!"]
+    assert messages.parent_ids == [None, "msg_1"]
+    assert list(messages) == conversation["messages"]
+    assert messages == conversation["messages"]
+    assert messages[-1]["metadata"] == {"model": "x"}
+    assert repr(messages).startswith("LLMCMessageColumns(ids=['msg_1', 'msg_2'], ")
+
+    # Message dicts are copies; edits go through the columns
+    messages[0]["content"] = "Changed"
+    assert messages[0]["content"] == "Hi"
+    messages.contents[0] = "Changed"
+    assert messages[0]["content"] == "Changed"
+    assert messages != conversation["messages"]
+
+
+def _write_javascript_style_file(file_path: Path, attachment_data: tuple = (b"a", b"b")) -> None:
+    """Write an LLMC file using the JavaScript SDK database schema."""
+    yaml_bytes = b"version: '0.1'\ncreated: '2024-01-15T10:30:00Z'\n" \
+        b"participants:\n- role: user\n- role: assistant\n"
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db_path = Path(tmp_dir) / "js.db"
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA application_id = 0x4C4C4D43;")
+        conn.execute("""
+            CREATE TABLE messages (
+                id INTEGER PRIMARY KEY, sequence INTEGER, role TEXT, content TEXT,
+                timestamp TEXT, parent_id INTEGER, metadata TEXT
+            )
+        """)
+        conn.execute("""
+            CREATE TABLE attachments (
+                id INTEGER PRIMARY KEY, message_id INTEGER, filename TEXT,
+                content_type TEXT, size INTEGER, data BLOB, checksum TEXT, metadata TEXT
+            )
+        """)
+        conn.executemany(
+            "INSERT INTO messages VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [
+                (1, 1, "user", "Look at these", "2024-01-15T10:30:00Z", None, None),
+                (2, 2, "assistant", "Nice!", "2024-01-15T10:30:05Z", 1, '{"model": "x"}'),
+            ],
+        )
+        conn.executemany(
+            "INSERT INTO attachments VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (1, 1, "a.txt", "text/plain", 1, attachment_data[0], None, None),
+                (2, 1, "b.txt", "text/plain", 1, attachment_data[1], None, None),
+            ],
+        )
+        conn.commit()
+        conn.close()
+        sqlite_bytes = db_path.read_bytes()
+
+    header = b"LLMC\x01\x00\x00\x00" + struct.pack(
+        "<IIQ", 1, len(yaml_bytes), 32 + len(yaml_bytes)
+    ) + b"\x00" * 8
+    file_path.write_bytes(header + yaml_bytes + sqlite_bytes)
+
+
+def test_parse_javascript_schema(tmp_path):
+    """Test parsing a file that uses the JavaScript SDK database schema."""
+    file_path = tmp_path / "js.llmc"
+    _write_javascript_style_file(file_path)
+
+    conversation = parse_file(str(file_path))
+
+    assert conversation["metadata"]["created_at"] == "2024-01-15T10:30:00Z"
+    assert conversation["metadata"]["participants"] == ["user", "assistant"]
+
+    first, second = conversation["messages"]
+    assert first["id"] == "msg_1"
+    assert first["attachments"] == ["att_1", "att_2"]
+    assert "parent_id" not in first
+    assert second["parent_id"] == "msg_1"
+    assert second["metadata"] == {"model": "x"}
+    assert "attachments" not in second
+
+    assert [a["id"] for a in conversation["attachments"]] == ["att_1", "att_2"]
+    assert conversation["attachments"][1]["data"] == b"b"
+
+
+def test_lazy_attachments_without_blob_data(tmp_path):
+    """Test that lazily parsed NULL and TEXT attachment data match an eager parse."""
+    file_path = tmp_path / "js.llmc"
+    _write_javascript_style_file(file_path, attachment_data=(None, "b"))
+
+    eager = parse_file(str(file_path))["attachments"]
+    lazy = LLMCParser(lazy_attachments=True).parse_file(str(file_path))["attachments"]
+
+    assert [a["data"] for a in eager] == [None, "b"]
+    assert [a["data"] for a in lazy] == [None, "b"]
+    assert lazy == eager
+
+
 def test_round_trip_with_javascript_file():
     """Test parsing the JavaScript SDK example file."""
     # Path to JavaScript SDK example